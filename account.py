@@ -1,16 +1,19 @@
 from transaction import Transaction
+from policy import get_policy, TransactionLimitError, AccountPolicyError
 from decimal import Decimal, ROUND_HALF_UP
+from bisect import bisect_left, bisect_right, insort
 import logging
 import calendar
-from sqlalchemy import Column, Integer, String, ForeignKey, Float
-from sqlalchemy.orm import relationship, backref, mapped_column
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, inspect, func, select, case
+from sqlalchemy.orm import relationship, backref, mapped_column, object_session
 from db_base import *
 
 logging.basicConfig(filename='bank.log', level=logging.DEBUG,
                     format="%(asctime)s|%(levelname)s|%(message)s", datefmt="%Y-%m-%d %H:%M:%S" )
 
 class Account(Base):
-    '''Base class for a bank account. Maintains balance, account number, and transaction history'''
+    '''A bank account. Maintains balance, account number, and transaction history.
+    Interest, limits, and fees come from the policy of the account's type'''
     
     __tablename__ = 'account'
 
@@ -18,23 +21,27 @@ class Account(Base):
     _acc_num = mapped_column(Integer, primary_key=True)
     _balance = mapped_column(Float(asdecimal=True))
     _account_type = Column(String(9))
-    _transactions = relationship('Transaction', backref=backref('account'))
+    _transactions = relationship('Transaction', backref=backref('account'),
+                                 order_by='(Transaction._date, Transaction._id)')
 
-    __mapper_args__ = {
-        'polymorphic_identity':'account',
-        'polymorphic_on': _account_type
-    }
 
-
-    def __init__(self, acc_num):
+    def __init__(self, acc_num, account_type):
         self._acc_num = acc_num
         self._balance = 0
-        
+        self._account_type = account_type
+
 
     def _get_acct_num(self):
         return self._acc_num
 
 
+    def _get_policy(self):
+        policy = get_policy(self._account_type)
+        if policy is None:
+            raise AccountPolicyError(self._account_type)
+        return policy
+
+
     def add_transaction(self, amount, date, type, session):
         '''Creates and adds transaction to account, updates account balance
         Arguments:
@@ -42,8 +49,9 @@ class Account(Base):
             date (datetime): date of transaction
             type (string): whether it is a normal transaction, interest, or fees'''
         transaction = Transaction(amount, date, type)
-        if self._transactions:                              # if not first transaction, check sequence
-            self._check_transaction_sequence(transaction)
+        last_transaction = self._find_last_transaction()
+        if last_transaction is not None:                    # if not first transaction, check sequence
+            self._check_transaction_sequence(transaction, last_transaction)
         if type == 'Transaction':                           # if normal transaction, check overdraft and limits
             balance_ok = self._no_overdraft(amount)
             limits_ok = self._doesnt_exceedlimit(date)
@@ -53,14 +61,15 @@ class Account(Base):
 
         if type == 'Interest' or type == 'Fees' or (balance_ok and limits_ok):
             self._balance += amount
-            self._transactions.append(transaction)
-            self._transactions = sorted(self._transactions)
+            if self._transactions_loaded():
+                insort(self._transactions, transaction, key=Transaction.get_date)
+            else:
+                transaction.account = self                  # adds to the ledger without loading it
             session.add(transaction)
             logging.debug(f"Created transaction: {self._acc_num}, {amount}")
 
 
-    def _check_transaction_sequence(self, transaction):
-        last_transaction = self._get_last_transaction()
+    def _check_transaction_sequence(self, transaction, last_transaction):
         if transaction < last_transaction:
             raise TransactionSequenceError(last_transaction_date=last_transaction.get_date())
 
@@ -73,7 +82,7 @@ class Account(Base):
         
 
     def _doesnt_exceedlimit(self, date):
-        return True
+        return self._get_policy().check_limits(self, date)
 
 
     def apply_interest_and_fees(self, session):
@@ -90,27 +99,40 @@ class Account(Base):
     
 
     def _get_last_transaction(self):
-        return self._transactions[-1]
+        last_transaction = self._find_last_transaction()
+        if last_transaction is None:
+            raise IndexError("account has no transactions")
+        return last_transaction
+
+
+    def _find_last_transaction(self):
+        if self._transactions_loaded():
+            return self._transactions[-1] if self._transactions else None
+        query = self._filter_dates(select(Transaction), None, None)
+        query = query.order_by(Transaction._date.desc(), Transaction._id.desc()).limit(1)
+        return object_session(self).scalars(query).first()
     
 
     def _add_interest(self, date, session):
-        interest = self._balance * self._interest_rate
+        interest = self._balance * self._get_policy().interest_rate
         self.add_transaction(amount = interest, date = date, type= 'Interest', session=session)
         
 
     def _add_fees(self, date, session):
-        pass
+        fee = self._get_policy().fee(self._balance)
+        if fee is not None:
+            self.add_transaction(amount = fee,
+                                 date = date,
+                                 type = 'Fee',
+                                 session = session)
     
 
     def _interestfees_already_applied(self, date):
-        input_year = date.year
-        input_month = date.month
         # Count number of times interest/fees have been applies this month
-        count = sum(1 for transaction in self._transactions if
-                    transaction.get_date().year == input_year and 
-                    transaction.get_date().month == input_month and 
-                    (transaction.get_type() == 'Interest' or
-                     transaction.get_type() == 'Fees'))
+        month_start = date.replace(day=1)
+        count = sum(1 for transaction in self.transactions_between(month_start, date) if
+                    transaction.get_type() == 'Interest' or
+                    transaction.get_type() == 'Fees')
         if count > 0:
             return True
         else:
@@ -121,98 +143,82 @@ class Account(Base):
         '''Returns list of all transactions for this account'''
         return self._transactions
 
-    def __str__(self):
-        '''Formats the account number and balance of the account.'''
-        rounded_balance = Decimal(self._balance).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        return f"#{self._acc_num:09},\tbalance: ${rounded_balance:,.2f}"
-
-    
-
-class CheckingAccount(Account):
-    '''A checking account'''
-
-    __tablename__ = 'checking'
-
-    _acc_num = mapped_column(Integer, ForeignKey('account._acc_num'), primary_key=True)
-    _interest_rate = mapped_column(Float(asdecimal=True))
-    _balance_threshold = mapped_column(Integer)
-    _low_balance_fee = mapped_column(Float(asdecimal=True))
-
-    __mapper_args__ = {
-        'polymorphic_identity': 'checking',
-    }
-    
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._interest_rate = Decimal("0.0008")
-        self._balance_threshold = 100
-        self._low_balance_fee = Decimal("-5.44")
-
-
-    def _add_fees(self, date, session):
-        if self._balance < self._balance_threshold:
-            self.add_transaction(amount = self._low_balance_fee,
-                                 date = date, 
-                                 type = 'Fee',
-                                 session = session)
-
-
-    def __str__(self):
-        return "Checking" + super().__str__()
-
 
-class SavingsAccount(Account):
-    '''A savings account'''
-
-    __tablename__ = 'savings'
-
-    _acc_num = mapped_column(Integer, ForeignKey('account._acc_num'), primary_key=True)
-    _interest_rate = mapped_column(Float(asdecimal=True))
-    _daily_limit = mapped_column(Integer)
-    _monthly_limit = mapped_column(Integer)
-
-    __mapper_args__ = {
-        'polymorphic_identity': 'savings',
-    }
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._interest_rate = Decimal("0.0041")
-        self._daily_limit = 2
-        self._monthly_limit = 5
+    def transactions_between(self, start=None, end=None):
+        '''Returns transactions dated from start to end, inclusive, in date order
+        Arguments:
+            start (date): earliest date to include, or None for no lower bound
+            end (date): latest date to include, or None for no upper bound'''
+        if self._transactions_loaded():
+            low, high = self._bisect_dates(start, end)
+            return self._transactions[low:high]
+        query = self._filter_dates(select(Transaction), start, end)
+        return object_session(self).scalars(query.order_by(Transaction._date, Transaction._id)).all()
 
 
-    def _doesnt_exceedlimit(self, date):
-        # Get user inputted year/month/day
-        input_year = date.year
-        input_month = date.month
-        input_day = date.day
-
-        # Count number of transactions with the same day and month
-        day_count = sum(1 for transaction in self._transactions if
-                    transaction.get_date().year == input_year and 
-                    transaction.get_date().month == input_month and 
-                    transaction.get_date().day == input_day and
-                    transaction.get_type() == 'Transaction')
-
-        month_count = sum(1 for transaction in self._transactions if
-                    transaction.get_date().year == input_year and 
-                    transaction.get_date().month == input_month and
-                    transaction.get_type() == 'Transaction')
-
-        # Check if transaction adheres to limits  
-        if day_count >= self._daily_limit:
-            raise TransactionLimitError(message='This transaction could not be completed because this account already has 2 transactions in this day.')
-        elif month_count >= self._monthly_limit:
-            raise TransactionLimitError(message='This transaction could not be completed because this account already has 5 transactions in this month.')
-        else:
-            return True
-    
+    def count_between(self, start=None, end=None, type=None):
+        '''Returns the number of transactions dated from start to end, inclusive
+        Arguments:
+            start (date): earliest date to include, or None for no lower bound
+            end (date): latest date to include, or None for no upper bound
+            type (string): only count transactions of this type, or None for all types'''
+        if self._transactions_loaded():
+            low, high = self._bisect_dates(start, end)
+            if type is None:
+                return high - low
+            return sum(1 for transaction in self._transactions[low:high] if transaction.get_type() == type)
+        query = self._filter_dates(select(func.count(Transaction._id)), start, end)
+        if type is not None:
+            query = query.where(Transaction._type == type)
+        return object_session(self).scalar(query)
+
+
+    def count_day_and_month(self, date, type=None):
+        '''Returns the number of transactions on date and in date's month, from one bisect
+        of the month or one query
+        Arguments:
+            date (date): day whose day and month to count
+            type (string): only count transactions of this type, or None for all types'''
+        month_start = date.replace(day=1)
+        month_end = date.replace(day=calendar.monthrange(date.year, date.month)[1])
+        if self._transactions_loaded():
+            low, high = self._bisect_dates(month_start, month_end)
+            month = [transaction for transaction in self._transactions[low:high]
+                     if type is None or transaction.get_type() == type]
+            return sum(1 for transaction in month if transaction.get_date() == date), len(month)
+        day_count = func.coalesce(func.sum(case((Transaction._date == date, 1), else_=0)), 0)
+        query = self._filter_dates(select(day_count, func.count(Transaction._id)), month_start, month_end)
+        if type is not None:
+            query = query.where(Transaction._type == type)
+        return tuple(object_session(self).execute(query).one())
+
+
+    def _transactions_loaded(self):
+        # Unloaded transactions of a persistent account are queried with SQL instead of loaded
+        return object_session(self) is None or '_transactions' not in inspect(self).unloaded
+
+
+    def _bisect_dates(self, start, end):
+        low = 0 if start is None else bisect_left(self._transactions, start, key=Transaction.get_date)
+        high = len(self._transactions) if end is None else bisect_right(self._transactions, end, key=Transaction.get_date)
+        return low, high
+
+
+    def _filter_dates(self, query, start, end):
+        query = query.where(Transaction._acc_num == self._acc_num)
+        if start is not None:
+            query = query.where(Transaction._date >= start)
+        if end is not None:
+            query = query.where(Transaction._date <= end)
+        return query
 
     def __str__(self):
         '''Formats the type, account number, and balance of the account.'''
-        return "Savings" + super().__str__()
+        rounded_balance = Decimal(self._balance).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        policy = get_policy(self._account_type)
+        label = policy.label if policy else self._account_type.capitalize()
+        return f"{label}#{self._acc_num:09},\tbalance: ${rounded_balance:,.2f}"
+
     
 
 class OverdrawError(Exception):
@@ -233,10 +239,3 @@ class TransactionSequenceError(Exception):
         else:
             self.message = f"New transactions must be from {self._latest_date} onward."
         super().__init__(self.message)
-
-
-class TransactionLimitError(Exception):
-    '''Raised when a pending transaction violates the savings account daily/monthly transaction limit'''
-    def __init__(self, message):
-        self.message = message
-        super().__init__(self.message)
\ No newline at end of file
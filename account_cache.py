@@ -0,0 +1,92 @@
+from account import Account
+from collections import OrderedDict
+import logging
+import time
+from sqlalchemy import inspect
+
+logging.basicConfig(filename='bank.log', level=logging.DEBUG,
+                    format="%(asctime)s|%(levelname)s|%(message)s", datefmt="%Y-%m-%d %H:%M:%S" )
+
+class AccountCache:
+    '''Read-through cache of accounts between the front ends and the session.
+    Holds at most max_size recently used accounts and drops any account that is least
+    recently used or older than ttl seconds. Transactions are not loaded by the cache;
+    date-range reads on a cached account run as indexed queries instead'''
+
+    def __init__(self, session, max_size=64, ttl=300, clock=time.monotonic):
+        self._session = session
+        self._max_size = max_size
+        self._ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()       # acc_num -> (account, time loaded)
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._writes = 0
+        self._invalidations = 0
+
+
+    def get(self, acc_num):
+        '''Returns an account based on the account number, loading it on a miss'''
+        now = self._clock()
+        self._evict_expired(now)
+        entry = self._entries.get(acc_num)
+        if entry is not None:
+            account, _ = entry
+            if not inspect(account).expired_attributes:
+                self._entries.move_to_end(acc_num)
+                self._hits += 1
+                return account
+            self._evict(acc_num)                            # expired in the session, reload it below
+
+        self._misses += 1
+        account = self._session.get(Account, acc_num)
+        if account is None:
+            return None
+        self._entries[acc_num] = (account, now)
+        while len(self._entries) > self._max_size:
+            self._evict(next(iter(self._entries)))
+        return account
+
+
+    def invalidate(self, acc_num=None):
+        '''Marks an account as written after a commit, or every cached account as stale if no
+        number is given. A written account stays cached: the session already holds its new state'''
+        if acc_num is None:
+            for cached_num in list(self._entries):
+                account, _ = self._entries.pop(cached_num)
+                self._session.expire(account)
+                self._invalidations += 1
+        elif acc_num in self._entries:
+            account, _ = self._entries[acc_num]
+            self._entries[acc_num] = (account, self._clock())
+            self._entries.move_to_end(acc_num)
+            self._writes += 1
+
+
+    def _evict_expired(self, now):
+        stale = [acc_num for acc_num, (_, loaded_at) in self._entries.items() if now - loaded_at > self._ttl]
+        for acc_num in stale:
+            self._evict(acc_num)
+
+
+    def _evict(self, acc_num):
+        # Only the cache's reference is dropped; the session's identity map holds accounts
+        # weakly, so an account nothing else refers to is freed and reloads on its next get
+        del self._entries[acc_num]
+        self._evictions += 1
+        logging.debug(f"Evicted account from cache: {acc_num}")
+
+
+    def stats(self):
+        '''Returns hit, miss, eviction, write, and invalidation counts for the cache'''
+        lookups = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "writes": self._writes,
+            "invalidations": self._invalidations,
+            "size": len(self._entries),
+            "hit_rate": self._hits / lookups if lookups else 0.0
+        }
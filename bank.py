@@ -1,7 +1,8 @@
-from account import SavingsAccount, CheckingAccount
+from account import Account
+from policy import get_policy
 import logging
-from sqlalchemy import Integer, create_engine
-from sqlalchemy.orm import relationship, backref, mapped_column
+from sqlalchemy import Integer, create_engine, insert, select, func
+from sqlalchemy.orm import relationship, backref, mapped_column, object_session
 from db_base import *
 
 logging.basicConfig(filename='bank.log', level=logging.DEBUG,
@@ -16,32 +17,46 @@ class Bank(Base):
 
     def add_account(self, type, session):
         '''Creates bank account and adds to list of accounts'''
-        acc_num = self._get_new_acc_num()
-        if type == "savings":
-            new_acc = SavingsAccount(acc_num)
-        elif type == "checking":
-            new_acc = CheckingAccount(acc_num)
-        else:
+        if get_policy(type) is None:
             return None
-        self._accounts.append(new_acc)
+        acc_num = self._get_new_acc_num(session)
+        new_acc = Account(acc_num, type)
+        new_acc.bank = self                             # doesn't load the list of accounts
         session.add(new_acc)
         logging.debug(f"Created account: {acc_num}")
 
 
-    def _get_new_acc_num(self):
-        return len(self._accounts) + 1
+    def open_accounts(self, type, count, session, batch_size=1000):
+        '''Creates count bank accounts of one type with a block of consecutive account numbers.
+        Returns the account numbers opened'''
+        if get_policy(type) is None or count <= 0:
+            return []
+        session.flush()
+        last_acc_num = session.scalar(select(func.max(Account._acc_num))) or 0
+        acc_nums = range(last_acc_num + 1, last_acc_num + count + 1)
+        for start in range(0, count, batch_size):
+            rows = [{"_id": self._id, "_acc_num": acc_num, "_balance": 0, "_account_type": type}
+                    for acc_num in acc_nums[start:start + batch_size]]
+            session.execute(insert(Account), rows)
+        session.expire(self, ["_accounts"])              # reload the list with the new accounts
+        logging.debug(f"Created accounts: {acc_nums.start}-{acc_nums.stop - 1}")
+        return list(acc_nums)
+
+
+    def _get_new_acc_num(self, session):
+        session.flush()
+        return (session.scalar(select(func.max(Account._acc_num))) or 0) + 1
  
 
     def get_all_accounts(self):
-        '''Returns all accounts'''
-        return self._accounts
+        '''Returns all accounts in account number order. Accounts are queried rather than
+        kept in the bank, so they are freed once the caller no longer uses them'''
+        query = select(Account).where(Account._id == self._id).order_by(Account._acc_num)
+        return object_session(self).scalars(query).all()
     
     def get_account(self, acc_num):
         '''Returns an account based on the account number'''
-        for account in self._accounts:
-            if account._acc_num == acc_num:
-                return account
-        return None
+        return object_session(self).get(Account, acc_num)
 
     
 if __name__ == "__main__":
@@ -0,0 +1,69 @@
+import cli
+from bank import Bank, Base
+from policy import load_policies
+from decimal import setcontext, BasicContext
+from contextlib import redirect_stdout
+import argparse
+import io
+import os
+import tempfile
+import time
+import sqlalchemy
+from sqlalchemy import event
+from sqlalchemy.orm.session import sessionmaker
+
+setcontext(BasicContext)
+
+def _count_queries(engine):
+    counter = {"queries": 0}
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter["queries"] += 1
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    return counter
+
+
+def run(count, type):
+    '''Opens count accounts in a temporary database, then renders the summary with a fresh BankCLI'''
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = sqlalchemy.create_engine(f"sqlite:///{os.path.join(tmp_dir, 'bank.db')}")
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(engine, expire_on_commit=False)     # same as cli.py's __main__
+        counter = _count_queries(engine)
+
+        with Session() as session:
+            load_policies(session)
+            bank = Bank()
+            session.add(bank)
+            session.commit()
+
+            counter["queries"] = 0
+            start = time.perf_counter()
+            bank.open_accounts(type, count, session)
+            session.commit()
+            open_time = time.perf_counter() - start
+            open_queries = counter["queries"]
+
+        cli.Session = Session
+        bank_cli = cli.BankCLI()
+        output = io.StringIO()
+        counter["queries"] = 0
+        start = time.perf_counter()
+        with redirect_stdout(output):
+            bank_cli._summary()
+        summary_time = time.perf_counter() - start
+        summary_queries = counter["queries"]
+        lines = output.getvalue().splitlines()
+        bank_cli._session.close()
+
+        print(f"Opened {count} {type} accounts: {open_time:.3f}s, {open_queries} queries")
+        print(f"Rendered summary of {len(lines)} accounts: {summary_time:.3f}s, {summary_queries} queries")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark bulk account opening and the account summary")
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--type", default="checking")
+    args = parser.parse_args()
+    run(args.count, args.type)
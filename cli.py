@@ -1,7 +1,10 @@
 from bank import Bank, Base
 from decimal import Decimal, InvalidOperation, setcontext, BasicContext
 from datetime import datetime
-from account import OverdrawError, TransactionSequenceError, TransactionLimitError
+from account import OverdrawError, TransactionSequenceError, TransactionLimitError, AccountPolicyError
+from account_cache import AccountCache
+from transaction import Transaction
+from policy import load_policies
 import logging
 import sqlalchemy
 from sqlalchemy.orm.session import Session, sessionmaker
@@ -25,6 +28,9 @@ class BankCLI:
             logging.debug("Saved to bank.db")
         else:
             logging.debug("Loaded from bank.db")
+        self._policies = load_policies(self._session)
+        self._session.commit()
+        self._accounts = AccountCache(self._session)
 
         self._choices = {
             "1": self._open_account,
@@ -65,7 +71,7 @@ Enter command
 
     # Open account
     def _open_account(self):
-        acc_type = input("Type of account? (checking/savings)\n>")
+        acc_type = input(f"Type of account? ({'/'.join(self._policies)})\n>")
         self._bank.add_account(acc_type, self._session)
         self._session.commit()
         logging.debug("Saved to bank.db")
@@ -80,7 +86,7 @@ Enter command
     # Select account
     def _select_account(self):
         acc_num = int(input("Enter account number\n>"))
-        self._currentacc = self._bank.get_account(acc_num)
+        self._currentacc = self._accounts.get(acc_num)
 
 
     # Add transaction
@@ -104,6 +110,7 @@ Enter command
                 
                 self._currentacc.add_transaction(amount, date, "Transaction", self._session)
                 self._session.commit()
+                self._accounts.invalidate(self._currentacc._get_acct_num())
                 logging.debug("Saved to bank.db")
                 break
         except AttributeError:
@@ -114,15 +121,30 @@ Enter command
             print(e.message)
         except TransactionSequenceError as e:
             print(e.message)
+        except AccountPolicyError as e:
+            print(e.message)
 
 
     # List transactions
     def _list_transactions(self):
-        try:
-            for transaction in self._currentacc.get_transactions():
-                print(transaction)
-        except AttributeError:
+        if self._currentacc is None:
             print("This command requires that you first select an account.")
+            return
+        start = self._input_optional_date("Start date? (YYYY-MM-DD, blank for earliest)\n>")
+        end = self._input_optional_date("End date? (YYYY-MM-DD, blank for latest)\n>")
+        for transaction in self._currentacc.transactions_between(start, end):
+            print(transaction)
+
+
+    def _input_optional_date(self, prompt):
+        while True:
+            date = input(prompt)
+            if not date:
+                return None
+            try:
+                return datetime.strptime(date, "%Y-%m-%d").date()
+            except ValueError:
+                print("Please try again with a valid date in the format YYYY-MM-DD.")
 
 
     # Interests and fees
@@ -130,23 +152,29 @@ Enter command
         try:
             self._currentacc.apply_interest_and_fees(self._session)
             self._session.commit()
+            self._accounts.invalidate(self._currentacc._get_acct_num())
             logging.debug("Saved to bank.db")
         except AttributeError:
             print("This command requires that you first select an account.")
         except TransactionSequenceError as e:
             print(e.message)
+        except AccountPolicyError as e:
+            print(e.message)
         except IndexError:
             print("No transactions have been added to apply interest to.")
 
 
     # Quit
     def _quit(self):
+        logging.debug(f"Account cache stats: {self._accounts.stats()}")
         exit(0)
 
 
 if __name__ == "__main__":
     engine = sqlalchemy.create_engine(f"sqlite:///bank.db")
     Base.metadata.create_all(engine)
-    Session = sessionmaker(engine)
+    for index in Transaction.__table__.indexes:       # create_all skips indexes of existing tables
+        index.create(engine, checkfirst=True)
+    Session = sessionmaker(engine, expire_on_commit=False)     # AccountCache invalidates accounts on writes
 
     BankCLI().run()
\ No newline at end of file
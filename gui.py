@@ -1,7 +1,10 @@
 from bank import Bank, Base
 from decimal import Decimal, InvalidOperation, setcontext, BasicContext
 from datetime import datetime
-from account import OverdrawError, TransactionSequenceError, TransactionLimitError
+from account import OverdrawError, TransactionSequenceError, TransactionLimitError, AccountPolicyError
+from account_cache import AccountCache
+from transaction import Transaction
+from policy import load_policies
 import logging
 import tkinter as tk
 import tkinter.messagebox
@@ -34,6 +37,9 @@ class BankCLI:
             logging.debug("Saved to bank.db")
         else:
             logging.debug("Loaded from bank.db")
+        self._policies = load_policies(self._session)
+        self._session.commit()
+        self._accounts = AccountCache(self._session)
 
         self._window = tk.Tk()
         self._window.title("My Bank")
@@ -53,6 +59,17 @@ class BankCLI:
 
         self._menu_frame.grid(row=0, column=1, columnspan=2)
 
+        # Optional date range for listing transactions
+        tk.Label(self._menu_frame, text="From:").grid(row=2, column=1)
+        self._start_entry = tk.Entry(self._menu_frame, width=10)
+        self._start_entry.grid(row=2, column=2)
+        tk.Label(self._menu_frame, text="To:").grid(row=2, column=3)
+        self._end_entry = tk.Entry(self._menu_frame, width=10)
+        self._end_entry.grid(row=2, column=4)
+        tk.Button(self._menu_frame,
+                  text="Filter transactions",
+                  command=self._filter_transactions).grid(row=2, column=5)
+
         self._accounts_frame = tk.Frame(self._window)
         self._accounts_frame.grid(row=2, column=1, columnspan=8, sticky="ew")
 
@@ -83,7 +100,7 @@ class BankCLI:
         account_type_label = tk.Label(account_frame, text="Select account type:")
         account_type_label.grid(row=0, column=0, padx=5, pady=5)
         account_type_var = tk.StringVar()
-        account_type_options = ["checking", "savings"]
+        account_type_options = list(self._policies)
         account_type_menu = tk.OptionMenu(account_frame, account_type_var, *account_type_options)
         account_type_menu.grid(row=0, column=1, padx=5, pady=5)
 
@@ -129,6 +146,7 @@ class BankCLI:
                 try:
                     self._currentacc.add_transaction(amount, date, "Transaction", self._session)
                     self._session.commit()
+                    self._accounts.invalidate(self._currentacc._get_acct_num())
                     logging.debug("Saved to bank.db")
                     transaction_frame.destroy()
                     self._summary()
@@ -141,6 +159,8 @@ class BankCLI:
                     tkinter.messagebox.showwarning(title=None, message=e.message)
                 except TransactionSequenceError as e:
                     tkinter.messagebox.showwarning(title=None, message=e.message)
+                except AccountPolicyError as e:
+                    tkinter.messagebox.showwarning(title=None, message=e.message)
             
         # Change entry box color depending on if amount and date inputs are valid
         def _validate_amount(event=None):
@@ -193,13 +213,36 @@ class BankCLI:
         for widget in self._transactions_frame.winfo_children():
             widget.destroy()
 
-        transactions = self._currentacc.get_transactions()
+        try:
+            start = self._get_optional_date(self._start_entry)
+            end = self._get_optional_date(self._end_entry)
+        except ValueError:
+            tkinter.messagebox.showwarning(title=None, message="Please try again with a valid date in the format YYYY-MM-DD.")
+            return
+
+        transactions = self._currentacc.transactions_between(start, end)
         for i, transaction in enumerate(transactions):
             color = "green" if transaction.get_amount() >= 0 else "red"
             transaction_label = tk.Label(self._transactions_frame, text=str(transaction), fg=color)
             transaction_label.grid(row=i, column=3, padx=5, pady=5)
 
 
+    # Lists transactions of the selected account within the entered dates
+    def _filter_transactions(self):
+        if self._currentacc is None:
+            tkinter.messagebox.showwarning(title=None, message="This command requires that you first select an account.")
+        else:
+            self._list_transactions()
+
+
+    # Returns the date in a date entry box, or None if it is blank
+    def _get_optional_date(self, entry):
+        date = entry.get().strip()
+        if not date:
+            return None
+        return datetime.strptime(date, "%Y-%m-%d").date()
+
+
     # Displays all accounts and their info
     def _summary(self):
         # Clear the existing accounts display
@@ -218,7 +261,7 @@ class BankCLI:
             radio_button.grid(row=i, column=0, padx=5, pady=5)
             
             # Bind the radio button to a callback function
-            radio_button.bind("<Button-1>", lambda event, acc=account: self._select_account_and_list_transactions(acc))
+            radio_button.bind("<Button-1>", lambda event, acc_num=account._get_acct_num(): self._select_account_and_list_transactions(acc_num))
 
         # Adjust window size if needed
         self._window.update_idletasks()
@@ -232,6 +275,7 @@ class BankCLI:
         try:
             self._currentacc.apply_interest_and_fees(self._session)
             self._session.commit()
+            self._accounts.invalidate(self._currentacc._get_acct_num())
             logging.debug("Saved to bank.db")
             self._summary()
             self._list_transactions()
@@ -239,13 +283,15 @@ class BankCLI:
             tkinter.messagebox.showwarning(title=None, message="This command requires that you first select an account.")
         except TransactionSequenceError as e:
             tkinter.messagebox.showwarning(title=None, message=e.message)
+        except AccountPolicyError as e:
+            tkinter.messagebox.showwarning(title=None, message=e.message)
         except IndexError:
             tkinter.messagebox.showwarning(title=None, message="No transactions have been added to apply interest to.")
 
 
     # Allows us to both update current account and list transactions when an account is selected
-    def _select_account_and_list_transactions(self, account):
-        self._select_account(account)
+    def _select_account_and_list_transactions(self, acc_num):
+        self._select_account(self._accounts.get(acc_num))
         self._list_transactions()
 
 
@@ -259,6 +305,8 @@ class BankCLI:
 if __name__ == "__main__":
     engine = sqlalchemy.create_engine(f"sqlite:///bank.db")
     Base.metadata.create_all(engine)
-    Session = sessionmaker(engine) 
+    for index in Transaction.__table__.indexes:       # create_all skips indexes of existing tables
+        index.create(engine, checkfirst=True)
+    Session = sessionmaker(engine, expire_on_commit=False)     # AccountCache invalidates accounts on writes
     
     BankCLI()
\ No newline at end of file
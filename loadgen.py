@@ -0,0 +1,198 @@
+import cli
+from bank import Base
+from decimal import Decimal
+from datetime import date, timedelta
+from collections import Counter, defaultdict
+from contextlib import redirect_stdout
+from unittest import mock
+import argparse
+import cProfile
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import sqlalchemy
+from sqlalchemy import event
+from sqlalchemy.orm.session import sessionmaker
+
+class StackSampler:
+    '''Samples the call stack of a thread at a fixed interval and writes collapsed stacks
+    (one "frame;frame;frame count" line per stack) for flame graph tools'''
+
+    def __init__(self, thread_id, interval=0.001):
+        self._thread_id = thread_id
+        self._interval = interval
+        self._stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+
+    def start(self):
+        self._thread.start()
+
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+    def _sample(self):
+        while not self._stop.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self._stacks[";".join(reversed(stack))] += 1
+
+
+    def write(self, path):
+        with open(path, "w") as file:
+            for stack, count in self._stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+class LoadGenerator:
+    '''Drives the BankCLI command handlers with a seeded workload of simulated users and days,
+    answering their input() prompts from a script and discarding their printed output'''
+
+    def __init__(self, db_path, seed=0, users=20, days=90, ops_per_day=10, start_date=date(2024, 1, 1)):
+        self._db_path = db_path
+        self._rng = random.Random(seed)
+        self._users = users
+        self._days = days
+        self._ops_per_day = ops_per_day
+        self._start_date = start_date
+
+        engine = sqlalchemy.create_engine(f"sqlite:///{db_path}")
+        Base.metadata.create_all(engine)
+        cli.Session = sessionmaker(engine, expire_on_commit=False)        # same as cli.py's __main__
+        self._commits = 0
+        event.listen(cli.Session, "after_commit", self._count_commit)
+
+        self._latencies = defaultdict(list)
+        self._db_sizes = []
+        self._user_accounts = [[] for _ in range(self._users)]
+        self._next_acc_num = 1
+        self._bank_cli = cli.BankCLI()
+        self._db_bytes_start = os.path.getsize(self._db_path)     # after the bank and policies are saved
+
+
+    def _count_commit(self, session):
+        self._commits += 1
+
+
+    def run(self):
+        '''Runs the workload day by day and returns the collected measurements'''
+        for user in range(self._users):
+            self._open_account(user)
+
+        for day in range(self._days):
+            current_date = self._start_date + timedelta(days=day)
+            for _ in range(self._ops_per_day):
+                self._random_command(self._rng.randrange(self._users), current_date)
+            if (current_date + timedelta(days=1)).month != current_date.month:
+                for user in range(self._users):
+                    for acc_num in self._user_accounts[user]:
+                        self._command("_select_account", [acc_num])
+                        self._command("_interest_fee", [])
+            self._db_sizes.append(os.path.getsize(self._db_path))
+
+        return self.report()
+
+
+    def _random_command(self, user, current_date):
+        choice = self._rng.random()
+        if choice < 0.03:
+            self._open_account(user)
+        elif choice < 0.08:
+            self._command("_summary", [])
+        else:
+            self._command("_select_account", [self._rng.choice(self._user_accounts[user])])
+            if choice < 0.80:
+                amount = Decimal(self._rng.randint(-20000, 30000)) / 100
+                self._command("_add_transaction", [str(amount), current_date.isoformat()])
+            else:
+                start = current_date - timedelta(days=self._rng.randint(0, 60))
+                self._command("_list_transactions", [start.isoformat(), current_date.isoformat()])
+
+
+    def _open_account(self, user):
+        self._command("_open_account", [self._rng.choice(["checking", "savings"])])
+        self._user_accounts[user].append(self._next_acc_num)
+        self._next_acc_num += 1
+
+
+    def _command(self, name, answers):
+        handler = getattr(self._bank_cli, name)
+        answers = iter(answers)
+        with mock.patch("builtins.input", lambda prompt="": next(answers)), redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            handler()
+            self._latencies[name].append(time.perf_counter() - start)
+
+
+    def report(self):
+        '''Returns per-command latency statistics, commit count, and database growth'''
+        commands = {}
+        for name, latencies in sorted(self._latencies.items()):
+            ordered = sorted(latencies)
+            commands[name] = {
+                "count": len(ordered),
+                "mean_ms": statistics.mean(ordered) * 1000,
+                "p50_ms": ordered[len(ordered) // 2] * 1000,
+                "p95_ms": ordered[int(len(ordered) * 0.95)] * 1000,
+                "max_ms": ordered[-1] * 1000
+            }
+        return {
+            "commands": commands,
+            "commits": self._commits,
+            "db_bytes_start": self._db_bytes_start,
+            "db_bytes_end": self._db_sizes[-1] if self._db_sizes else self._db_bytes_start,
+            "cache": self._bank_cli._accounts.stats()
+        }
+
+
+def _print_report(report):
+    print(f"{'command':<20}{'count':>8}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for name, stats in report["commands"].items():
+        print(f"{name:<20}{stats['count']:>8}{stats['mean_ms']:>10.3f}{stats['p50_ms']:>10.3f}"
+              f"{stats['p95_ms']:>10.3f}{stats['max_ms']:>10.3f}")
+    print(f"commits: {report['commits']}")
+    print(f"database size: {report['db_bytes_start']:,} -> {report['db_bytes_end']:,} bytes")
+    print(f"account cache: {report['cache']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a seeded workload against the BankCLI command handlers")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--ops-per-day", type=int, default=10)
+    parser.add_argument("--out", default=".", help="directory for the profile files")
+    parser.add_argument("--cprofile", action="store_true", help="also write a cProfile profile.pstats")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        generator = LoadGenerator(os.path.join(tmp_dir, "bank.db"), seed=args.seed, users=args.users,
+                                  days=args.days, ops_per_day=args.ops_per_day)
+        sampler = StackSampler(threading.get_ident())
+        profiler = cProfile.Profile() if args.cprofile else None
+        sampler.start()
+        if profiler:
+            profiler.enable()
+        report = generator.run()
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(os.path.join(args.out, "profile.pstats"))
+        sampler.stop()
+        sampler.write(os.path.join(args.out, "profile.folded"))
+
+    _print_report(report)
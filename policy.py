@@ -0,0 +1,164 @@
+from decimal import Decimal
+import logging
+from sqlalchemy import Integer, String, Float, inspect, text
+from sqlalchemy.orm import mapped_column
+from db_base import *
+
+logging.basicConfig(filename='bank.log', level=logging.DEBUG,
+                    format="%(asctime)s|%(levelname)s|%(message)s", datefmt="%Y-%m-%d %H:%M:%S" )
+
+class AccountPolicy(Base):
+    '''Stores the interest rate, transaction limits, and fee rule of an account type'''
+
+    __tablename__ = 'account_policy'
+
+    _name = mapped_column(String(9), primary_key=True)
+    _label = mapped_column(String)
+    _interest_rate = mapped_column(Float(asdecimal=True))
+    _balance_threshold = mapped_column(Integer, nullable=True)
+    _low_balance_fee = mapped_column(Float(asdecimal=True), nullable=True)
+    _daily_limit = mapped_column(Integer, nullable=True)
+    _monthly_limit = mapped_column(Integer, nullable=True)
+
+
+    def __init__(self, name, label, interest_rate, balance_threshold=None, low_balance_fee=None,
+                 daily_limit=None, monthly_limit=None):
+        self._name = name
+        self._label = label
+        self._interest_rate = interest_rate
+        self._balance_threshold = balance_threshold
+        self._low_balance_fee = low_balance_fee
+        self._daily_limit = daily_limit
+        self._monthly_limit = monthly_limit
+
+
+# Account types available when the database has no policies yet
+DEFAULT_POLICIES = {
+    "checking": dict(label="Checking", interest_rate=Decimal("0.0008"),
+                     balance_threshold=100, low_balance_fee=Decimal("-5.44")),
+    "savings": dict(label="Savings", interest_rate=Decimal("0.0041"),
+                    daily_limit=2, monthly_limit=5),
+}
+
+
+class CompiledPolicy:
+    '''Check functions built once from an account policy and called on every transaction'''
+
+    def __init__(self, name, label, interest_rate, balance_threshold=None, low_balance_fee=None,
+                 daily_limit=None, monthly_limit=None):
+        self.name = name
+        self.label = label
+        self.interest_rate = interest_rate
+        self.check_limits = _compile_limit_check(daily_limit, monthly_limit)
+        self.fee = _compile_fee_rule(balance_threshold, low_balance_fee)
+
+
+def _compile_limit_check(daily_limit, monthly_limit):
+    if daily_limit is None and monthly_limit is None:
+        return _no_limits
+
+    def check_limits(account, date):
+        # Count number of transactions with the same day and month
+        day_count, month_count = account.count_day_and_month(date, 'Transaction')
+
+        # Check if transaction adheres to limits
+        if daily_limit is not None and day_count >= daily_limit:
+            raise TransactionLimitError(message=f'This transaction could not be completed because this account already has {daily_limit} transactions in this day.')
+        elif monthly_limit is not None and month_count >= monthly_limit:
+            raise TransactionLimitError(message=f'This transaction could not be completed because this account already has {monthly_limit} transactions in this month.')
+        return True
+
+    return check_limits
+
+
+def _no_limits(account, date):
+    return True
+
+
+def _compile_fee_rule(balance_threshold, low_balance_fee):
+    if balance_threshold is None or low_balance_fee is None:
+        return _no_fee
+
+    def fee(balance):
+        if balance < balance_threshold:
+            return low_balance_fee
+        return None
+
+    return fee
+
+
+def _no_fee(balance):
+    return None
+
+
+_policies = {name: CompiledPolicy(name, **rules) for name, rules in DEFAULT_POLICIES.items()}
+
+
+# Per-account tables of the old CheckingAccount/SavingsAccount mappings and their rule columns
+LEGACY_TABLES = {
+    "checking": ["_interest_rate", "_balance_threshold", "_low_balance_fee"],
+    "savings": ["_interest_rate", "_daily_limit", "_monthly_limit"],
+}
+
+
+def _migrate_legacy_tables(session, stored):
+    '''Turns the rules stored per account in a legacy table into its type's policy and drops
+    the table. A table whose accounts disagree is kept and reported, since one policy can't hold it'''
+    table_names = inspect(session.connection()).get_table_names()
+    for name, columns in LEGACY_TABLES.items():
+        if name not in table_names:
+            continue
+        rules = session.execute(text(f"SELECT DISTINCT {', '.join(columns)} FROM {name}")).all()
+        if len(rules) > 1:
+            logging.warning(f"Kept table {name}: its accounts have {len(rules)} different rules")
+            continue
+        if rules and name not in stored:
+            legacy_rules = dict(DEFAULT_POLICIES[name])
+            for column, value in zip(columns, rules[0]):
+                if value is not None:
+                    legacy_rules[column[1:]] = Decimal(str(value)) if isinstance(value, float) else value
+            stored[name] = AccountPolicy(name, **legacy_rules)
+            session.add(stored[name])
+            logging.debug(f"Created account policy from table {name}")
+        session.execute(text(f"DROP TABLE {name}"))
+        logging.debug(f"Dropped table {name}")
+
+
+def load_policies(session):
+    '''Migrates legacy account type tables, adds any missing default policies to the database,
+    and compiles every stored policy'''
+    stored = {policy._name: policy for policy in session.query(AccountPolicy).all()}
+    _migrate_legacy_tables(session, stored)
+    for name, rules in DEFAULT_POLICIES.items():
+        if name not in stored:
+            stored[name] = AccountPolicy(name, **rules)
+            session.add(stored[name])
+            logging.debug(f"Created account policy: {name}")
+
+    _policies.clear()
+    for name, policy in stored.items():
+        _policies[name] = CompiledPolicy(name, policy._label, policy._interest_rate,
+                                         balance_threshold=policy._balance_threshold,
+                                         low_balance_fee=policy._low_balance_fee,
+                                         daily_limit=policy._daily_limit,
+                                         monthly_limit=policy._monthly_limit)
+    return _policies
+
+
+def get_policy(name):
+    '''Returns the compiled policy for an account type, or None if the type does not exist'''
+    return _policies.get(name)
+
+
+class TransactionLimitError(Exception):
+    '''Raised when a pending transaction violates the account type's daily/monthly transaction limit'''
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
+
+
+class AccountPolicyError(Exception):
+    '''Raised when an account's type has no policy, e.g. its policy row was deleted or renamed'''
+    def __init__(self, account_type):
+        self.message = f"Account type '{account_type}' has no policy. Add it to the account_policy table to use this account."
+        super().__init__(self.message)
@@ -1,5 +1,5 @@
 from datetime import date, timedelta
-from sqlalchemy import Float, Integer, String, ForeignKey, Date
+from sqlalchemy import Float, Integer, String, ForeignKey, Date, Index
 from sqlalchemy.orm import mapped_column
 from db_base import *
 
@@ -7,6 +7,7 @@ class Transaction(Base):
     '''Stores the amount, date, and type of a transaction'''
 
     __tablename__ = 'transaction'
+    __table_args__ = (Index('ix_transaction_acc_num_date', '_acc_num', '_date'),)
 
     _id = mapped_column(Integer, primary_key=True)
     _acc_num = mapped_column(Integer, ForeignKey('account._acc_num'))